@@ -1,8 +1,24 @@
-from typing import Dict, Any
+import os
+import re
+from typing import Dict, Any, List
 from langchain_core.prompts import PromptTemplate
 # from langchain.chains import LLMChain # Deprecated
 from core.retriever import retriever
-from core.llm import get_llm
+from core.llm import llm_gateway, LLMGatewayError
+from core.config import settings
+
+# Python: File "app/db.py", line 42, in connect
+PY_FRAME_RE = re.compile(r'File "(?P<file>[^"]+)", line (?P<line>\d+), in (?P<func>\S+)')
+# JavaScript: at connect (src/db.js:42:7), at async handler (...), at new Foo (...),
+# at Foo.bar [as baz] (...) or at src/db.js:42:7
+JS_FRAME_RE = re.compile(
+    r'^\s*at (?:async )?(?:(?:new )?(?P<func>[^()]+?) \()?(?P<file>[^\s()]+):(?P<line>\d+):\d+\)?\s*$'
+)
+EXCEPTION_RE = re.compile(r'^(?P<type>[A-Za-z_][\w.]*(?:Error|Exception|Exit|Interrupt))\b:?\s*(?P<message>.*)$')
+# Frames from these locations are library code, not the indexed codebase
+LIBRARY_MARKERS = ("site-packages", "dist-packages", "node_modules", "<frozen", "/lib/python", "node:internal")
+# Windows standard library, e.g. C:\Python311\Lib\json\decoder.py (but not C:\proj\lib\utils.py)
+WINDOWS_STDLIB_RE = re.compile(r'\\Python\d*\\Lib\\', re.IGNORECASE)
 
 DEBUG_TEMPLATE = """
 As an expert Software Engineer, your task is to analyze the following stack trace and code context to find the bug.
@@ -22,34 +38,102 @@ INSTRUCTIONS:
 RESPONSE:
 """
 
+def _is_library(file_path: str) -> bool:
+    return any(marker in file_path for marker in LIBRARY_MARKERS) or bool(WINDOWS_STDLIB_RE.search(file_path))
+
+def _extract_frames(error_trace: str) -> List[Dict[str, str]]:
+    """Returns the trace's frames in the application code, innermost first."""
+    lines = error_trace.splitlines()
+    python_frames = []
+    js_frames = []
+    for i, line in enumerate(lines):
+        match = PY_FRAME_RE.search(line)
+        if match:
+            # The source line follows the frame header, unless it is another frame
+            next_line = lines[i + 1].strip() if i + 1 < len(lines) else ""
+            code = "" if PY_FRAME_RE.search(next_line) else next_line
+            python_frames.append({**match.groupdict(), "code": code})
+            continue
+        match = JS_FRAME_RE.match(line)
+        if match:
+            js_frames.append({**match.groupdict(), "code": ""})
+
+    # Python lists the innermost frame last; JavaScript lists it first
+    frames = list(reversed(python_frames)) + js_frames
+    return [f for f in frames if not _is_library(f["file"])]
+
+def _extract_exception(error_trace: str) -> str:
+    for line in reversed(error_trace.splitlines()):
+        match = EXCEPTION_RE.match(line.strip())
+        if match:
+            return f"{match.group('type')}: {match.group('message')}".strip()
+    return ""
+
+def _build_queries(error_trace: str) -> List[str]:
+    """One query per relevant frame plus one for the exception type and message."""
+    queries = []
+    for frame in _extract_frames(error_trace)[:settings.DEBUG_MAX_FRAMES]:
+        func = frame["func"] or ""
+        queries.append(f"{func} in {os.path.basename(frame['file'])} {frame['code']}".strip())
+    exception = _extract_exception(error_trace)
+    if exception:
+        queries.append(exception)
+    if not queries:
+        # Unrecognised format: fall back to the tail of the trace
+        queries.append("\n".join(error_trace.splitlines()[-3:]))
+    return list(dict.fromkeys(queries))
+
+def _overlaps(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    if a.get("file_path") != b.get("file_path"):
+        return False
+    a_meta, b_meta = a.get("metadata", {}), b.get("metadata", {})
+    return (a_meta.get("start_line", 0) <= b_meta.get("end_line", 0)
+            and b_meta.get("start_line", 0) <= a_meta.get("end_line", 0))
+
+def _merge_hits(result_lists: List[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+    """
+    Merges per-query hits, taking each query's best hit before any query's second,
+    and drops hits whose file and line range overlap one already kept.
+    """
+    merged = []
+    depth = max((len(results) for results in result_lists), default=0)
+    for rank in range(depth):
+        tier = [results[rank] for results in result_lists if rank < len(results)]
+        for hit in sorted(tier, key=lambda r: r.get("score", 0), reverse=True):
+            if not any(_overlaps(hit, kept) for kept in merged):
+                merged.append(hit)
+    return merged[:limit]
+
 class DebugAgent:
     def __init__(self):
-        self.llm = get_llm()
         self.prompt = PromptTemplate(
             input_variables=["context", "error"],
             template=DEBUG_TEMPLATE
         )
-        # self.chain = LLMChain(llm=self.llm, prompt=self.prompt)
-        self.chain = self.prompt | self.llm
 
     def analyze_error(self, error_trace: str) -> str:
-        # 1. Extract keywords from trace for search (naive approach)
-        # In a real system, we'd parse the trace key frames.
-        # Here we just take the last few lines as query.
-        query = "\n".join(error_trace.splitlines()[-3:])
-        
-        # 2. Retrieve context
-        results = retriever.search(query, top_k=3)
-        context_str = "\n\n".join([f"File: {r['file_path']}\nCode:\n{r['content']}" for r in results])
-        
+        # 1. Build focused queries from the trace's frames and exception
+        queries = _build_queries(error_trace)
+
+        # 2. Retrieve context for all queries in one batch and merge the hits
+        result_lists = retriever.search_many(queries, top_k=settings.DEBUG_TOP_K_PER_QUERY)
+        results = _merge_hits(result_lists, settings.DEBUG_CONTEXT_CHUNKS)
+        context_str = "\n\n".join([
+            f"File: {r.get('file_path')} (lines {r['metadata'].get('start_line')}-{r['metadata'].get('end_line')})\n"
+            f"Code:\n{r.get('content')}"
+            for r in results
+        ])
+
         if not context_str:
             context_str = "No relevant code found in index."
 
         # 3. Generate analysis
         try:
-            # response = self.chain.run(context=context_str, error=error_trace)
-            response = self.chain.invoke({"context": context_str, "error": error_trace})
-            return response
+            prompt = self.prompt.format(context=context_str, error=error_trace)
+            return llm_gateway.generate(prompt, agent="debug")
+        except LLMGatewayError:
+            # Overload and timeouts are surfaced to the API as HTTP errors
+            raise
         except Exception as e:
             return f"Error: Could not connect to AI service (Ollama). details: {str(e)}"\
                    "\n\nPlease ensure Ollama is running with `ollama run mistral`."
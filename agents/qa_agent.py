@@ -1,8 +1,9 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from langchain_core.prompts import PromptTemplate
 # from langchain.chains import LLMChain # Deprecated
 from core.retriever import retriever
-from core.llm import get_llm
+from core.llm import llm_gateway, LLMGatewayError
+from core.config import settings
 
 QA_TEMPLATE = """
 You are a Senior Architect explaining a codebase. Use the following context to answer the question. 
@@ -19,24 +20,41 @@ ANSWER:
 
 class QAAgent:
     def __init__(self):
-        self.llm = get_llm()
         self.prompt = PromptTemplate(
             input_variables=["context", "question"],
             template=QA_TEMPLATE
         )
-        # self.chain = LLMChain(llm=self.llm, prompt=self.prompt)
-        self.chain = self.prompt | self.llm
+
+    def _retrieve(self, question: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Returns (summaries, code chunks). With a summary tier, code chunks are only
+        drilled into for the files and modules the top summaries point at.
+        """
+        if settings.QA_TWO_STAGE:
+            summaries, chunks = retriever.search_two_stage(
+                question, settings.QA_SUMMARY_TOP_K, settings.QA_DRILLDOWN_FILES, settings.QA_DRILLDOWN_CHUNKS
+            )
+            if summaries:
+                return summaries, chunks
+        # Summary tier disabled or not built for this index
+        return [], retriever.search(question, top_k=5)
 
     def ask(self, question: str) -> str:
         # 1. Retrieve context
-        results = retriever.search(question, top_k=5)
-        context_str = "\n\n".join([f"File: {r['file_path']}\nCode:\n{r['content']}" for r in results])
+        summaries, results = self._retrieve(question)
+        context_str = "\n\n".join(
+            [f"{'Module' if s['metadata'].get('type') == 'module_summary' else 'File'}: {s['file_path'] or '.'}\n"
+             f"Summary:\n{s['content']}" for s in summaries]
+            + [f"File: {r['file_path']}\nCode:\n{r['content']}" for r in results]
+        )
         
         # 2. Answer
         try:
-            # response = self.chain.run(context=context_str, question=question)
-            response = self.chain.invoke({"context": context_str, "question": question})
-            return response
+            prompt = self.prompt.format(context=context_str, question=question)
+            return llm_gateway.generate(prompt, agent="qa")
+        except LLMGatewayError:
+            # Overload and timeouts are surfaced to the API as HTTP errors
+            raise
         except Exception as e:
             return f"Error: Could not connect to AI service (Ollama). details: {str(e)}"\
                    "\n\nPlease ensure Ollama is running with `ollama run mistral`."
@@ -1,31 +1,57 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi.responses import PlainTextResponse, JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import os
 
 from core.indexer import indexer
+from core.summarizer import summarizer
+from core.git_source import GitError, resolve_commit
 from core.retriever import retriever
 from agents.qa_agent import qa_agent
 from agents.debug_agent import debug_agent
 from core.config import settings
+from core.llm import LLMQueueFullError, LLMTimeoutError
+from core.metrics import REGISTRY, REQUEST_SECONDS, collect_timings, timed
 
 app = FastAPI(title=settings.PROJECT_NAME, version="1.0.0")
 
 # Request Models
 class IndexRequest(BaseModel):
     repo_path: str
+    # Branch, tag or SHA to index from git objects instead of the working tree
+    commit: Optional[str] = None
+    # Also build the file/module summary tier (slow: one LLM call per changed file)
+    summarize: bool = False
 
 class SearchRequest(BaseModel):
     query: str
     limit: Optional[int] = 5
+    include_timings: bool = False
 
 class ExplainRequest(BaseModel):
     question: str
     file_context: Optional[str] = None
+    include_timings: bool = False
 
 class DebugRequest(BaseModel):
     error_trace: str
     context: Optional[str] = None
+    include_timings: bool = False
+
+def _with_timings(response: dict, timings: dict, include: bool) -> dict:
+    """Attaches the per-stage breakdown (seconds, plus prompt_tokens) when requested."""
+    if include:
+        response["timings"] = timings
+    return response
+
+@app.exception_handler(LLMQueueFullError)
+async def llm_queue_full(request, exc):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+@app.exception_handler(LLMTimeoutError)
+async def llm_timeout(request, exc):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
 
 @app.get("/")
 async def root():
@@ -36,20 +62,45 @@ async def trigger_indexing(request: IndexRequest, background_tasks: BackgroundTa
     if not os.path.exists(request.repo_path):
         raise HTTPException(status_code=400, detail="Repository path does not exist")
     
+    if request.commit:
+        if request.summarize:
+            raise HTTPException(status_code=400, detail="Summaries are built from the working tree, not a commit")
+        try:
+            commit = resolve_commit(request.repo_path, request.commit)
+        except GitError as e:
+            raise HTTPException(status_code=400, detail=f"Cannot resolve commit: {e}")
+        background_tasks.add_task(indexer.index_commit, request.repo_path, commit)
+        return {"status": "accepted", "message": f"Indexing commit {commit} in background", "commit": commit}
+
     background_tasks.add_task(indexer.index_repository, request.repo_path)
+    if request.summarize:
+        # Background tasks run in order, so summaries start once code indexing is done
+        background_tasks.add_task(summarizer.summarize_repository, request.repo_path)
     return {"status": "accepted", "message": "Indexing started in background"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+# Handlers that block on Endee or Ollama are plain `def` so FastAPI runs them in its
+# threadpool; concurrent requests then queue in the LLM gateway instead of the event loop.
 @app.post("/search")
-async def search_code(request: SearchRequest):
-    results = retriever.search(request.query, top_k=request.limit)
-    return {"results": results}
+def search_code(request: SearchRequest):
+    with collect_timings() as timings:
+        with timed(REQUEST_SECONDS, "total", endpoint="search"):
+            results = retriever.search(request.query, top_k=request.limit)
+    return _with_timings({"results": results}, timings, request.include_timings)
 
 @app.post("/explain")
-async def explain_code(request: ExplainRequest):
-    answer = qa_agent.ask(request.question)
-    return {"answer": answer}
+def explain_code(request: ExplainRequest):
+    with collect_timings() as timings:
+        with timed(REQUEST_SECONDS, "total", endpoint="explain"):
+            answer = qa_agent.ask(request.question)
+    return _with_timings({"answer": answer}, timings, request.include_timings)
 
 @app.post("/debug")
-async def debug_error(request: DebugRequest):
-    analysis = debug_agent.analyze_error(request.error_trace)
-    return {"analysis": analysis}
+def debug_error(request: DebugRequest):
+    with collect_timings() as timings:
+        with timed(REQUEST_SECONDS, "total", endpoint="debug"):
+            analysis = debug_agent.analyze_error(request.error_trace)
+    return _with_timings({"analysis": analysis}, timings, request.include_timings)
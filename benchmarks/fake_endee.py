@@ -0,0 +1,168 @@
+import json
+import re
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import msgpack
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INSERT_RE = re.compile(r"^/api/v1/index/([^/]+)/vector/insert$")
+SEARCH_RE = re.compile(r"^/api/v1/index/([^/]+)/search$")
+DELETE_RE = re.compile(r"^/api/v1/index/([^/]+)/vector/([^/]+)/delete$")
+
+class FakeIndex:
+    """Brute-force cosine index holding the same VectorObject fields Endee stores."""
+    def __init__(self, name: str, dim: int):
+        self.name = name
+        self.dim = dim
+        self.objects = {}  # id -> (meta, filter, vector)
+        self._matrix = None
+        self._ids = []
+        self._lock = threading.Lock()
+
+    def insert(self, items):
+        with self._lock:
+            for doc_id, meta, filter_, _norm, vector in items:
+                self.objects[doc_id] = (meta, filter_, np.asarray(vector, dtype=np.float32))
+            self._matrix = None
+
+    def delete(self, doc_id) -> bool:
+        with self._lock:
+            self._matrix = None
+            return self.objects.pop(doc_id, None) is not None
+
+    @staticmethod
+    def _matches(filter_json: str, conditions) -> bool:
+        """Applies Endee-style [{"field": {"$eq": value}}, ...] conditions to a stored filter."""
+        try:
+            fields = json.loads(filter_json or "{}")
+        except ValueError:
+            fields = {}
+        return all(
+            field in fields and fields[field] == op["$eq"]
+            for condition in conditions for field, op in condition.items()
+        )
+
+    def search(self, vector, k: int, conditions=None):
+        with self._lock:
+            if not self.objects:
+                return []
+            if self._matrix is None:
+                self._ids = list(self.objects)
+                matrix = np.stack([self.objects[i][2] for i in self._ids])
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                self._matrix = matrix / np.maximum(norms, 1e-12)
+            matrix, ids = self._matrix, self._ids
+            query = np.asarray(vector, dtype=np.float32)
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+            scores = matrix @ query
+            order = np.argsort(-scores)
+            if conditions:
+                order = [i for i in order if self._matches(self.objects[ids[i]][1], conditions)]
+            top = order[:k]
+            # VectorResult: [similarity, id, meta, filter, norm, vector]
+            return [
+                [float(scores[i]), ids[i], self.objects[ids[i]][0], self.objects[ids[i]][1], 0.0, []]
+                for i in top
+            ]
+
+class FakeEndee:
+    """
+    In-process stand-in for the Endee server, implementing the endpoints EndeeWrapper uses:
+    health, index list/create, msgpack vector insert, search (JSON in, msgpack out, with $eq
+    filters) and delete.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.indexes = {}
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _body(self) -> bytes:
+                length = int(self.headers.get("Content-Length", 0))
+                return self.rfile.read(length) if length else b""
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, status: int, data):
+                self._send(status, json.dumps(data).encode("utf-8"))
+
+            def do_GET(self):
+                if self.path == "/api/v1/health":
+                    self._json(200, {"status": "ok"})
+                elif self.path == "/api/v1/index/list":
+                    self._json(200, {"indexes": [{"name": name, "dim": idx.dim} for name, idx in fake.indexes.items()]})
+                else:
+                    self._json(404, {"error": "not found"})
+
+            def do_POST(self):
+                body = self._body()
+                if self.path == "/api/v1/index/create":
+                    payload = json.loads(body)
+                    fake.indexes.setdefault(payload["index_name"], FakeIndex(payload["index_name"], payload["dim"]))
+                    self._json(200, {"status": "created"})
+                    return
+
+                match = INSERT_RE.match(self.path)
+                if match:
+                    index = fake.indexes.get(match.group(1))
+                    if index is None:
+                        self._json(404, {"error": "index not found"})
+                        return
+                    index.insert(msgpack.unpackb(body, raw=False))
+                    self._json(200, {"status": "inserted"})
+                    return
+
+                match = SEARCH_RE.match(self.path)
+                if match:
+                    index = fake.indexes.get(match.group(1))
+                    if index is None:
+                        self._json(404, {"error": "index not found"})
+                        return
+                    payload = json.loads(body)
+                    conditions = json.loads(payload["filter"]) if payload.get("filter") else None
+                    results = index.search(payload["vector"], payload.get("k", 10), conditions)
+                    self._send(200, msgpack.packb(results), "application/msgpack")
+                    return
+
+                self._json(404, {"error": "not found"})
+
+            def do_DELETE(self):
+                self._body()
+                match = DELETE_RE.match(self.path)
+                index = fake.indexes.get(match.group(1)) if match else None
+                if index is not None and index.delete(match.group(2)):
+                    self._json(200, {"status": "deleted"})
+                else:
+                    self._json(404, {"error": "not found"})
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address[:2]
+        self._thread = None
+
+    def vector_count(self, index_name: str) -> int:
+        index = self.indexes.get(index_name)
+        return len(index.objects) if index else 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Fake Endee listening on {self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,91 @@
+import json
+import time
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+class FakeOllama:
+    """
+    In-process stand-in for Ollama's streaming /api/generate endpoint.
+    Prompt evaluation and generation are simulated with sleeps at configurable token rates,
+    and `parallel` caps concurrent generations like OLLAMA_NUM_PARALLEL does on a CPU host.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, tokens_per_second: float = 20.0,
+                 prompt_tokens_per_second: float = 500.0, response_tokens: int = 64, parallel: int = 1):
+        self.tokens_per_second = tokens_per_second
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+        self.response_tokens = response_tokens
+        self.generations = 0
+        self._slots = threading.Semaphore(parallel)
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                body = b"Ollama is running"
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if self.path != "/api/generate":
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for line in fake._generate(payload.get("prompt", ""), payload.get("model", "fake")):
+                    data = (json.dumps(line) + "\n").encode("utf-8")
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address[:2]
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _generate(self, prompt: str, model: str):
+        prompt_tokens = max(1, len(prompt) // 4)
+        with self._slots:
+            self.generations += 1
+            start = time.perf_counter()
+            time.sleep(prompt_tokens / self.prompt_tokens_per_second)
+            for i in range(self.response_tokens):
+                yield {"model": model, "response": f"token{i} ", "done": False}
+                time.sleep(1.0 / self.tokens_per_second)
+            yield {
+                "model": model,
+                "response": "",
+                "done": True,
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": self.response_tokens,
+                "total_duration": int((time.perf_counter() - start) * 1e9)
+            }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Fake Ollama listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
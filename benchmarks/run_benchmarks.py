@@ -0,0 +1,314 @@
+"""
+Offline RepoMind benchmark suite.
+
+Starts local stand-ins for Endee and Ollama, points RepoMind at them, and measures
+indexing throughput, /search latency under concurrent load, and /explain
+time-to-first-token. Results are written as JSON so runs can be compared:
+
+    python -m benchmarks.run_benchmarks --output results.json
+    python -m benchmarks.run_benchmarks --compare results.json
+
+The embedding model is loaded as usual, so it must already be in the local cache.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
+import requests
+
+from benchmarks.fake_endee import FakeEndee
+from benchmarks.fake_ollama import FakeOllama
+
+COLLECTION_NAME = "repomind_benchmark"
+
+WORDS = [
+    "user", "session", "token", "cache", "config", "request", "response", "parser", "index", "vector",
+    "query", "record", "handler", "stream", "buffer", "payload", "retry", "queue", "worker", "schema"
+]
+SEARCH_QUERIES = [
+    "where is the session token validated",
+    "how are requests retried",
+    "parse the config file",
+    "cache invalidation logic",
+    "worker queue processing",
+    "serialize the response payload"
+]
+EXPLAIN_QUESTION = "How does the request handler use the cache?"
+INDEX_STAGES = ("read", "parse", "embed", "insert")
+
+class BenchmarkError(Exception):
+    """Raised when a benchmark produced no valid measurement."""
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3)
+    }
+
+def generate_repo(root: str, num_files: int, functions_per_file: int, seed: int = 0):
+    """Writes a synthetic Python package tree with `num_files` modules."""
+    rng = random.Random(seed)
+    for i in range(num_files):
+        package = os.path.join(root, f"pkg{i // 20}")
+        os.makedirs(package, exist_ok=True)
+        lines = [f'"""Module {i}: {" ".join(rng.sample(WORDS, 4))}."""', "import os", ""]
+        for j in range(functions_per_file):
+            a, b = rng.sample(WORDS, 2)
+            lines += [
+                f"def {a}_{b}_{j}({a}, {b}=None):",
+                f'    """Combine the {a} with the {b} and return the result."""',
+                f"    if {b} is None:",
+                f"        {b} = os.environ.get('{b.upper()}', '')",
+                f"    return [{a}, {b}, {j}]",
+                ""
+            ]
+        name = rng.choice(WORDS).capitalize()
+        lines += [
+            f"class {name}Manager{i}:",
+            "    def __init__(self):",
+            "        self.items = []",
+            "",
+            "    def add(self, item):",
+            "        self.items.append(item)",
+            ""
+        ]
+        with open(os.path.join(package, f"module_{i}.py"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_api(app, port: int):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+def bench_indexing(indexer, endee: FakeEndee, sizes: List[int], functions_per_file: int, work_dir: str):
+    from core.metrics import collect_timings
+
+    results = []
+    for size in sizes:
+        repo = os.path.join(work_dir, f"repo_{size}")
+        generate_repo(repo, size, functions_per_file, seed=size)
+        before = endee.vector_count(COLLECTION_NAME)
+
+        with collect_timings() as timings:
+            start = time.perf_counter()
+            indexer.index_repository(repo)
+            elapsed = time.perf_counter() - start
+
+        chunks = endee.vector_count(COLLECTION_NAME) - before
+        stage_seconds = {stage.replace("index_", ""): value
+                         for stage, value in timings.items() if stage.startswith("index_")}
+        missing = [stage for stage in INDEX_STAGES if stage not in stage_seconds]
+        if chunks == 0 or missing:
+            raise BenchmarkError(
+                f"Indexing {size} files produced {chunks} chunks (stages missing: {missing or 'none'}); "
+                "check the indexer logs"
+            )
+        results.append({
+            "files": size,
+            "chunks": chunks,
+            "seconds": round(elapsed, 3),
+            "files_per_second": round(size / elapsed, 2),
+            "chunks_per_second": round(chunks / elapsed, 2),
+            "stage_seconds": stage_seconds
+        })
+        print(f"  indexing {size} files: {elapsed:.2f}s ({chunks} chunks)")
+    return results
+
+def bench_search(api_url: str, levels: List[int], num_requests: int):
+    def one_search(i: int) -> float:
+        start = time.perf_counter()
+        resp = requests.post(f"{api_url}/search", json={"query": SEARCH_QUERIES[i % len(SEARCH_QUERIES)], "limit": 5})
+        resp.raise_for_status()
+        return time.perf_counter() - start
+
+    one_search(0)  # Warm-up
+    results = []
+    for concurrency in levels:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(one_search, range(num_requests)))
+        elapsed = time.perf_counter() - start
+        results.append({
+            "concurrency": concurrency,
+            "requests": num_requests,
+            **latency_summary(latencies),
+            "throughput_rps": round(num_requests / elapsed, 2)
+        })
+        print(f"  search c={concurrency}: p50 {results[-1]['p50_ms']}ms p99 {results[-1]['p99_ms']}ms")
+    return results
+
+def bench_explain(api_url: str, num_requests: int, concurrency: int):
+    def one_explain(_) -> Dict[str, float]:
+        start = time.perf_counter()
+        resp = requests.post(f"{api_url}/explain", json={"question": EXPLAIN_QUESTION, "include_timings": True})
+        resp.raise_for_status()
+        timings = resp.json().get("timings", {})
+        # No llm_ttft means the generation never produced a token (e.g. the agent returned an error string)
+        return {"total": time.perf_counter() - start, "ttft": timings.get("llm_ttft"),
+                "prompt_tokens": timings.get("prompt_tokens", 0)}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one_explain, range(num_requests)))
+
+    ok = [s for s in samples if s["ttft"] is not None]
+    errors = len(samples) - len(ok)
+    if not ok:
+        raise BenchmarkError(f"None of the {num_requests} /explain requests reported a time-to-first-token")
+
+    ttft = latency_summary([s["ttft"] for s in ok])
+    total = latency_summary([s["total"] for s in ok])
+    result = {
+        "concurrency": concurrency,
+        "requests": num_requests,
+        "errors": errors,
+        "ttft_p50_ms": ttft["p50_ms"],
+        "ttft_p99_ms": ttft["p99_ms"],
+        "total_p50_ms": total["p50_ms"],
+        "total_p99_ms": total["p99_ms"],
+        "prompt_tokens_mean": round(sum(s["prompt_tokens"] for s in ok) / len(ok), 1)
+    }
+    print(f"  explain c={concurrency}: ttft p50 {result['ttft_p50_ms']}ms, total p50 {result['total_p50_ms']}ms, "
+          f"{errors} errors")
+    return result
+
+def flatten(results: Dict[str, Any]) -> Dict[str, float]:
+    """Maps comparable metrics to stable keys, e.g. 'search.concurrency=4.p99_ms'."""
+    flat = {}
+    for entry in results.get("indexing", []):
+        for key in ("seconds", "files_per_second", "chunks_per_second"):
+            flat[f"indexing.files={entry['files']}.{key}"] = entry[key]
+    for entry in results.get("search", []):
+        for key in ("p50_ms", "p99_ms", "throughput_rps"):
+            flat[f"search.concurrency={entry['concurrency']}.{key}"] = entry[key]
+    explain = results.get("explain")
+    if explain:
+        for key in ("ttft_p50_ms", "ttft_p99_ms", "total_p50_ms", "total_p99_ms", "prompt_tokens_mean", "errors"):
+            flat[f"explain.{key}"] = explain[key]
+    return flat
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]):
+    old, new = flatten(baseline), flatten(current)
+    print(f"\n{'metric':<45} {'baseline':>12} {'current':>12} {'change':>9}")
+    for key in sorted(set(old) & set(new)):
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else float("nan")
+        print(f"{key:<45} {old[key]:>12} {new[key]:>12} {change:>+8.1f}%")
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the offline RepoMind benchmark suite.")
+    parser.add_argument("--repo-sizes", default="50,200,800", help="Comma-separated synthetic repo sizes (files)")
+    parser.add_argument("--functions-per-file", type=int, default=5)
+    parser.add_argument("--search-concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--search-requests", type=int, default=200, help="Search requests per concurrency level")
+    parser.add_argument("--explain-requests", type=int, default=5)
+    parser.add_argument("--explain-concurrency", type=int, default=1)
+    parser.add_argument("--ollama-tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--ollama-prompt-tokens-per-second", type=float, default=500.0)
+    parser.add_argument("--ollama-response-tokens", type=int, default=64)
+    parser.add_argument("--ollama-parallel", type=int, default=1, help="Concurrent generations the fake Ollama serves")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    endee = FakeEndee().start()
+    ollama = FakeOllama(
+        tokens_per_second=args.ollama_tokens_per_second,
+        prompt_tokens_per_second=args.ollama_prompt_tokens_per_second,
+        response_tokens=args.ollama_response_tokens,
+        parallel=args.ollama_parallel
+    ).start()
+    work_dir = tempfile.mkdtemp(prefix="repomind_bench_")
+
+    # Settings and the Endee/embedder singletons are created at import time,
+    # so the environment must point at the stand-ins before importing RepoMind.
+    os.environ.update({
+        "ENDEE_HOST": endee.host,
+        "ENDEE_PORT": str(endee.port),
+        "ENDEE_COLLECTION_NAME": COLLECTION_NAME,
+        "OLLAMA_BASE_URL": ollama.base_url,
+        "INDEX_STATE_DIR": os.path.join(work_dir, "state")
+    })
+    from core.indexer import indexer
+    from api.main import app
+
+    api_port = free_port()
+    api = start_api(app, api_port)
+    api_url = f"http://127.0.0.1:{api_port}"
+
+    config = vars(args).copy()
+    config.pop("output")
+    config.pop("compare")
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": config
+        }
+    }
+
+    try:
+        print("Indexing throughput")
+        sizes = [int(s) for s in args.repo_sizes.split(",")]
+        results["indexing"] = bench_indexing(indexer, endee, sizes, args.functions_per_file, work_dir)
+
+        print("Search latency")
+        levels = [int(c) for c in args.search_concurrency.split(",")]
+        results["search"] = bench_search(api_url, levels, args.search_requests)
+
+        print("Explain time-to-first-token")
+        results["explain"] = bench_explain(api_url, args.explain_requests, args.explain_concurrency)
+    except BenchmarkError as e:
+        print(f"\nBenchmark failed: {e}")
+        sys.exit(1)
+    finally:
+        api.should_exit = True
+        endee.stop()
+        ollama.stop()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, allow_nan=False)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), results)
+
+if __name__ == "__main__":
+    main()
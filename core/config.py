@@ -6,11 +6,46 @@ class Settings(BaseSettings):
     ENDEE_HOST: str = "localhost"
     ENDEE_PORT: int = 8080
     ENDEE_COLLECTION_NAME: str = "repomind_codebase"
+    ENDEE_SUMMARY_COLLECTION_NAME: str = "repomind_summaries"
     
     EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
     LLM_MODEL_NAME: str = "mistral"  # For Ollama
     OLLAMA_BASE_URL: str = "http://localhost:11434"
 
+    # LLM gateway: concurrent generations sent to Ollama, queued requests beyond
+    # that before rejecting, and how long a caller waits for its answer
+    LLM_MAX_CONCURRENCY: int = 1
+    LLM_MAX_QUEUE_SIZE: int = 16
+    LLM_TIMEOUT: float = 300.0  # Seconds
+
+    # Concurrent Endee searches when one request issues several queries
+    SEARCH_MAX_PARALLEL: int = 8
+
+    # DebugAgent: stack frames turned into queries, hits per query, chunks kept in the prompt
+    DEBUG_MAX_FRAMES: int = 4
+    DEBUG_TOP_K_PER_QUERY: int = 3
+    DEBUG_CONTEXT_CHUNKS: int = 6
+
+    # Summary tier: file content sent to the LLM per file summary
+    SUMMARY_MAX_FILE_CHARS: int = 6000
+
+    # QAAgent two-stage retrieval: summaries retrieved first, then code chunks
+    # from the top files/modules only (falls back to plain code search without summaries).
+    # An empty summary tier is re-checked at most every QA_SUMMARY_RECHECK_SECONDS.
+    QA_TWO_STAGE: bool = True
+    QA_SUMMARY_TOP_K: int = 4
+    QA_DRILLDOWN_FILES: int = 3
+    QA_DRILLDOWN_CHUNKS: int = 3
+    QA_SUMMARY_RECHECK_SECONDS: float = 300.0
+
+    # Where per-repository index state (e.g. the indexed commit) is persisted
+    INDEX_STATE_DIR: str = ".repomind"
+
+    # Bulk ingest: chunks per insert batch (one checkpoint each) and retry policy
+    INDEX_BATCH_SIZE: int = 256
+    INSERT_MAX_RETRIES: int = 3
+    INSERT_RETRY_BACKOFF: float = 1.0  # Seconds, doubled after each failed attempt
+
     class Config:
         env_file = ".env"
 
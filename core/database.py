@@ -9,19 +9,23 @@ except ImportError:
     msgpack = None
 
 from .config import settings
+from .metrics import timed, ENDEE_SECONDS, METADATA_DECODE_SECONDS
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Metadata fields copied into Endee's filter field, so searches can be restricted to them
+FILTER_FIELDS = ("repo_path", "file_path", "module")
+
 class EndeeWrapper:
     """
     Check if Endee is running via HTTP.
     Uses requests to communicate with Endee REST API.
     """
-    def __init__(self):
+    def __init__(self, collection_name: str = None):
         self.host = settings.ENDEE_HOST
         self.port = settings.ENDEE_PORT
-        self.collection_name = settings.ENDEE_COLLECTION_NAME
+        self.collection_name = collection_name or settings.ENDEE_COLLECTION_NAME
         self.base_url = f"http://{self.host}:{self.port}/api/v1"
         self._connect()
 
@@ -91,10 +95,11 @@ class EndeeWrapper:
         """
         Inserts vectors into Endee.
         Uses MessagePack to support metadata.
+        Returns True if Endee acknowledged the insert.
         """
         if msgpack is None:
             logger.error("msgpack module not installed. Cannot insert vectors with metadata.")
-            return
+            return False
 
         payload = []
         for i, vec in enumerate(vectors):
@@ -119,10 +124,11 @@ class EndeeWrapper:
             # filter: string (JSON)
             # norm: float
             # vector: list[float]
+            filter_fields = {field: meta[field] for field in FILTER_FIELDS if field in meta}
             item = [
                 doc_id,
                 meta_bytes,
-                "{}", # Default empty filter
+                json.dumps(filter_fields),
                 0.0,  # Default norm
                 vec
             ]
@@ -131,22 +137,99 @@ class EndeeWrapper:
         try:
             url = f"{self.base_url}/index/{self.collection_name}/vector/insert"
             packed_data = msgpack.packb(payload)
-            resp = requests.post(
-                url, 
-                data=packed_data, 
-                headers={"Content-Type": "application/msgpack"}, 
-                timeout=30
-            )
+            with timed(ENDEE_SECONDS, "endee_insert", operation="insert"):
+                resp = requests.post(
+                    url, 
+                    data=packed_data, 
+                    headers={"Content-Type": "application/msgpack"}, 
+                    timeout=30
+                )
             if resp.status_code == 200:
                 logger.info(f"Inserted {len(vectors)} vectors into {self.collection_name}")
-            else:
-                logger.error(f"Error inserting vectors: {resp.text}")
+                return True
+            logger.error(f"Error inserting vectors: {resp.text}")
         except Exception as e:
             logger.error(f"Error inserting vectors: {e}")
+        return False
 
-    def search(self, query_vector, limit=5):
+    def delete_vectors(self, ids):
+        """
+        Deletes vectors by ID.
+        Returns the number of deletions Endee acknowledged.
+        """
+        deleted = 0
+        for doc_id in ids:
+            try:
+                url = f"{self.base_url}/index/{self.collection_name}/vector/{doc_id}/delete"
+                resp = requests.delete(url, timeout=10)
+                if resp.status_code == 200:
+                    deleted += 1
+                else:
+                    logger.warning(f"Failed to delete vector {doc_id}: {resp.text}")
+            except Exception as e:
+                logger.error(f"Error deleting vector {doc_id}: {e}")
+        logger.info(f"Deleted {deleted}/{len(ids)} vectors from {self.collection_name}")
+        return deleted
+
+    def _parse_search_response(self, content):
+        """Decodes a MessagePack search response and decompresses each result's metadata."""
+        # Unpack response
+        # Response is array of VectorResult
+        # VectorResult: [similarity, id, meta, filter, norm, vector]
+        try:
+            results_raw = msgpack.unpackb(content, raw=False)
+        except Exception as e:
+            logger.error(f"Failed to unpack search response: {e}")
+            return []
+
+        parsed_results = []
+        for r in results_raw:
+            if len(r) < 3: # Basic validation
+                continue
+                
+            similarity = r[0]
+            doc_id = r[1]
+            meta_bytes = r[2]
+            
+            # Decompress metadata
+            try:
+                if meta_bytes:
+                    meta = json.loads(zlib.decompress(meta_bytes).decode('utf-8'))
+                else:
+                    meta = {}
+            except Exception as e:
+                logger.warning(f"Failed to decompress metadata for result {doc_id}: {e}")
+                meta = {}
+                
+            # Add score to meta for convenience or keep separate
+            # The app likely expects a list of dicts with 'score', 'metadata', etc.
+            # Or maybe it expects just the metadata dict plus score?
+            # Let's return a clean structure
+            result_item = {
+                "id": doc_id,
+                "score": similarity,
+                "metadata": meta
+            }
+            
+            # Flatten content for UI convenience
+            if "content" in meta:
+                result_item["content"] = meta["content"]
+            if "file_path" in meta:
+                result_item["file_path"] = meta["file_path"]
+            if "name" in meta:
+                result_item["name"] = meta["name"]
+            if "language" in meta:
+                result_item["language"] = meta["language"]
+
+            parsed_results.append(result_item)
+        
+        return parsed_results
+
+    def search(self, query_vector, limit=5, filters=None):
         """
         Searches Endee.
+        `filters` restricts results on FILTER_FIELDS, e.g.
+        [{"repo_path": {"$eq": "/src/app"}}, {"file_path": {"$eq": "core/db.py"}}].
         Returns parsed results with metadata.
         """
         if msgpack is None:
@@ -158,64 +241,18 @@ class EndeeWrapper:
             "k": limit,
             "include_vectors": False # We don't need vectors back, just metadata
         }
+        if filters:
+            payload["filter"] = json.dumps(filters)
         
         try:
             url = f"{self.base_url}/index/{self.collection_name}/search"
             # Send query as JSON (easier), response will be MessagePack
-            resp = requests.post(url, json=payload, headers={"Content-Type": "application/json"}, timeout=10)
+            with timed(ENDEE_SECONDS, "endee_search", operation="search"):
+                resp = requests.post(url, json=payload, headers={"Content-Type": "application/json"}, timeout=10)
             
             if resp.status_code == 200:
-                # Unpack response
-                # Response is array of VectorResult
-                # VectorResult: [similarity, id, meta, filter, norm, vector]
-                try:
-                    results_raw = msgpack.unpackb(resp.content, raw=False)
-                except Exception as e:
-                    logger.error(f"Failed to unpack search response: {e}")
-                    return []
-
-                parsed_results = []
-                for r in results_raw:
-                    if len(r) < 3: # Basic validation
-                        continue
-                        
-                    similarity = r[0]
-                    doc_id = r[1]
-                    meta_bytes = r[2]
-                    
-                    # Decompress metadata
-                    try:
-                        if meta_bytes:
-                            meta = json.loads(zlib.decompress(meta_bytes).decode('utf-8'))
-                        else:
-                            meta = {}
-                    except Exception as e:
-                        logger.warning(f"Failed to decompress metadata for result {doc_id}: {e}")
-                        meta = {}
-                        
-                    # Add score to meta for convenience or keep separate
-                    # The app likely expects a list of dicts with 'score', 'metadata', etc.
-                    # Or maybe it expects just the metadata dict plus score?
-                    # Let's return a clean structure
-                    result_item = {
-                        "id": doc_id,
-                        "score": similarity,
-                        "metadata": meta
-                    }
-                    
-                    # Flatten content for UI convenience
-                    if "content" in meta:
-                        result_item["content"] = meta["content"]
-                    if "file_path" in meta:
-                        result_item["file_path"] = meta["file_path"]
-                    if "name" in meta:
-                        result_item["name"] = meta["name"]
-                    if "language" in meta:
-                        result_item["language"] = meta["language"]
-
-                    parsed_results.append(result_item)
-                
-                return parsed_results
+                with timed(METADATA_DECODE_SECONDS, "metadata_decode"):
+                    return self._parse_search_response(resp.content)
             else:
                 logger.error(f"Error during search: {resp.text}")
                 return []
@@ -223,5 +260,6 @@ class EndeeWrapper:
             logger.error(f"Error during search: {e}")
             return []
 
-# Singleton instance
+# Singleton instances: code chunks, and the file/module summary tier
 db_client = EndeeWrapper()
+summary_db_client = EndeeWrapper(settings.ENDEE_SUMMARY_COLLECTION_NAME)
@@ -0,0 +1,125 @@
+import subprocess
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Only regular files are indexed; symlinks (120000) and submodules (160000) are skipped
+REGULAR_FILE_MODES = (b"100644", b"100755")
+
+class GitError(Exception):
+    """Raised when a git command fails or an object cannot be read."""
+
+def _run_git(repo_path: str, *args: str) -> bytes:
+    result = subprocess.run(["git", "-C", repo_path, *args], capture_output=True)
+    if result.returncode != 0:
+        stderr = result.stderr.decode("utf-8", errors="ignore").strip()
+        raise GitError(f"git {' '.join(args)} failed: {stderr}")
+    return result.stdout
+
+def _decode_path(path: bytes) -> str:
+    return path.decode("utf-8", errors="replace")
+
+def resolve_commit(repo_path: str, rev: str) -> str:
+    """Resolves a branch, tag or revision expression to a full commit SHA."""
+    return _run_git(repo_path, "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}").decode().strip()
+
+def commit_exists(repo_path: str, commit: str) -> bool:
+    try:
+        resolve_commit(repo_path, commit)
+        return True
+    except GitError:
+        return False
+
+def list_tree(repo_path: str, commit: str) -> Dict[str, str]:
+    """Returns {path: blob_sha} for every regular file in the commit's tree."""
+    out = _run_git(repo_path, "ls-tree", "-r", "-z", "--full-tree", commit)
+    files = {}
+    for entry in out.split(b"\0"):
+        if not entry:
+            continue
+        # Format: <mode> SP <type> SP <sha> TAB <path>
+        info, path = entry.split(b"\t", 1)
+        mode, obj_type, sha = info.split()
+        if obj_type != b"blob" or mode not in REGULAR_FILE_MODES:
+            continue
+        files[_decode_path(path)] = sha.decode()
+    return files
+
+def diff_tree(repo_path: str, old_commit: str, new_commit: str) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Lists paths changed between two commits.
+    Returns (status, path, new_blob_sha) tuples; new_blob_sha is None for deletions
+    and for paths that are no longer regular files.
+    """
+    out = _run_git(repo_path, "diff-tree", "-r", "-z", "--no-renames", old_commit, new_commit)
+    parts = out.split(b"\0")
+    changes = []
+    # Format: :<old_mode> <new_mode> <old_sha> <new_sha> <status> NUL <path> NUL
+    for i in range(0, len(parts) - 1, 2):
+        info, path = parts[i], parts[i + 1]
+        if not info.startswith(b":"):
+            continue
+        _, new_mode, _, new_sha, status = info[1:].split()
+        status = status.decode()[0]
+        blob = new_sha.decode() if status != "D" and new_mode in REGULAR_FILE_MODES else None
+        changes.append((status, _decode_path(path), blob))
+    return changes
+
+class GitObjectReader:
+    """
+    Reads blobs from a local repository through a single long-lived
+    `git cat-file --batch` process instead of spawning one subprocess per file.
+    """
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self._proc = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        if self._proc is None:
+            self._proc = subprocess.Popen(
+                ["git", "-C", self.repo_path, "cat-file", "--batch"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+
+    def read(self, object_name: str) -> bytes:
+        """Returns the raw contents of a blob given its SHA or a `<commit>:<path>` expression."""
+        if self._proc is None:
+            self.open()
+
+        self._proc.stdin.write(object_name.encode("utf-8") + b"\n")
+        self._proc.stdin.flush()
+
+        # Header: <sha> SP <type> SP <size> LF, or <object> SP missing LF
+        header = self._proc.stdout.readline()
+        if not header:
+            raise GitError("git cat-file exited unexpectedly")
+        fields = header.split()
+        if fields[-1] == b"missing" or len(fields) != 3:
+            raise GitError(f"Object not found: {object_name}")
+
+        size = int(fields[2])
+        data = self._proc.stdout.read(size)
+        self._proc.stdout.read(1)  # Trailing LF
+        return data
+
+    def close(self):
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=5)
+        except Exception as e:
+            logger.warning(f"git cat-file did not exit cleanly: {e}")
+            self._proc.kill()
+        finally:
+            self._proc = None
@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Dict, Any, List
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_FILE = "dead_letter.jsonl"
+
+def _state_path(key: str, suffix: str) -> str:
+    # One file per (collection, key) pair; keys are repository paths or ingest job keys
+    key = f"{settings.ENDEE_COLLECTION_NAME}:{key}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(settings.INDEX_STATE_DIR, f"{digest}{suffix}")
+
+def _append_line(path: str, record: Dict[str, Any]):
+    """Appends a JSON line and fsyncs it so it survives a process restart."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def _load_json(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable state file {path}: {e}")
+        return {}
+
+def _save_json(path: str, data: Dict[str, Any]):
+    """Writes to a temp file and renames it so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def load_state(repo_path: str) -> Dict[str, Any]:
+    """Returns the persisted index state for a repository, or {} if it was never indexed."""
+    return _load_json(_state_path(os.path.abspath(repo_path), ".json"))
+
+def save_state(repo_path: str, state: Dict[str, Any]):
+    """Atomically persists the index state for a repository."""
+    _save_json(_state_path(os.path.abspath(repo_path), ".json"), state)
+
+def load_summary_cache(repo_path: str) -> Dict[str, Any]:
+    """Returns cached file/module summaries for a repository, keyed by path."""
+    return _load_json(_state_path(os.path.abspath(repo_path), ".summaries.json"))
+
+def save_summary_cache(repo_path: str, cache: Dict[str, Any]):
+    _save_json(_state_path(os.path.abspath(repo_path), ".summaries.json"), cache)
+
+def load_checkpoint(job_key: str) -> List[Dict[str, Any]]:
+    """Returns the batches an ingest job has already completed, oldest first."""
+    path = _state_path(job_key, ".checkpoint.jsonl")
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-write; the batch is simply redone
+                logger.warning(f"Skipping corrupt checkpoint line in {path}")
+    return records
+
+def append_checkpoint(job_key: str, record: Dict[str, Any]):
+    _append_line(_state_path(job_key, ".checkpoint.jsonl"), record)
+
+def clear_checkpoint(job_key: str):
+    path = _state_path(job_key, ".checkpoint.jsonl")
+    if os.path.exists(path):
+        os.remove(path)
+
+def append_dead_letter(job_key: str, record: Dict[str, Any]):
+    """Stores a batch that could not be inserted so it can be inspected or replayed."""
+    record = {"job": job_key, "failed_at": time.time(), **record}
+    _append_line(os.path.join(settings.INDEX_STATE_DIR, DEAD_LETTER_FILE), record)
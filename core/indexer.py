@@ -1,13 +1,50 @@
 import os
 import ast
+import posixpath
+import time
+import uuid
+import hashlib
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Tuple
 from sentence_transformers import SentenceTransformer
 from core.database import db_client
 from core.config import settings
+from core.metrics import timed, INDEX_STAGE_SECONDS, INDEX_ITEMS
+from core.git_source import GitObjectReader, resolve_commit, commit_exists, list_tree, diff_tree
+from core.index_state import (
+    load_state, save_state, load_checkpoint, append_checkpoint, clear_checkpoint, append_dead_letter
+)
 
 logger = logging.getLogger(__name__)
 
+INDEXED_EXTENSIONS = (".py", ".js", ".ts", ".md")
+SKIPPED_DIRS = ("venv", ".git", "__pycache__")
+
+def is_indexable(file_path: str) -> bool:
+    directory = os.path.dirname(file_path)
+    if any(skipped in directory for skipped in SKIPPED_DIRS):
+        return False
+    return file_path.endswith(INDEXED_EXTENSIONS)
+
+def walk_working_tree(repo_path: str) -> List[str]:
+    """
+    Lists indexable files under repo_path, in a stable order.
+    Paths are repo-relative with "/" separators, the same form git uses, so
+    working-tree and commit indexing store identical `file_path` values.
+    """
+    paths = []
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = [d for d in dirs if not any(skipped in d for skipped in SKIPPED_DIRS)]
+        for file in files:
+            path = os.path.relpath(os.path.join(root, file), repo_path).replace(os.sep, "/")
+            if is_indexable(path):
+                paths.append(path)
+    return sorted(paths)
+
+def read_text_file(file_path: str) -> str:
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
 class CodeParser:
     """Parses code files to extract meaningful chunks (Functions, Classes)."""
     
@@ -68,47 +105,244 @@ class Indexer:
         self.embedder = SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
         self.parser = CodeParser()
 
+    def _process_file(self, source: str, file_path: str, content: str) -> Tuple[List[Dict[str, Any]], List[List[float]]]:
+        """
+        Parses and embeds one file. Chunk IDs are deterministic so replayed batches stay idempotent.
+        Returns ([], []) only when parsing finds nothing to index; embedding errors are raised.
+        """
+        with timed(INDEX_STAGE_SECONDS, "index_parse", stage="parse"):
+            chunks = self.parser.parse_file(file_path, content)
+        INDEX_ITEMS.inc(stage="parse")
+        if not chunks:
+            return [], []
+
+        # Generate embeddings for chunks
+        texts = [chunk["content"] for chunk in chunks]
+        with timed(INDEX_STAGE_SECONDS, "index_embed", stage="embed"):
+            embeddings = self.embedder.encode(texts).tolist()
+        INDEX_ITEMS.inc(len(chunks), stage="embed")
+
+        for chunk in chunks:
+            key = f"{source}:{file_path}:{chunk['start_line']}:{chunk['end_line']}:{chunk['name']}"
+            chunk["id"] = str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+            # file_path is repo-relative, so keep which repository it belongs to
+            chunk["repo_path"] = source
+            # Directory the summary tier groups files by; lets Q&A drill into one module
+            chunk["module"] = posixpath.dirname(file_path)
+        return chunks, embeddings
+
+    def _insert_with_retry(self, embeddings: List[List[float]], chunks: List[Dict[str, Any]]) -> bool:
+        for attempt in range(settings.INSERT_MAX_RETRIES + 1):
+            if db_client.insert_vectors(embeddings, chunks):
+                return True
+            if attempt < settings.INSERT_MAX_RETRIES:
+                delay = settings.INSERT_RETRY_BACKOFF * (2 ** attempt)
+                logger.warning(f"Insert of {len(chunks)} vectors failed, retrying in {delay:.1f}s")
+                time.sleep(delay)
+        return False
+
+    def _flush_batch(self, job_key: str, files: Dict[str, List[str]], hashes: Dict[str, str],
+                     chunks: List[Dict[str, Any]], embeddings: List[List[float]]) -> bool:
+        """Inserts one batch and checkpoints it; exhausted retries go to the dead-letter file."""
+        if chunks:
+            with timed(INDEX_STAGE_SECONDS, "index_insert", stage="insert"):
+                inserted = self._insert_with_retry(embeddings, chunks)
+            if not inserted:
+                logger.error(f"Giving up on batch of {len(chunks)} vectors from {len(files)} files; sent to dead-letter file")
+                append_dead_letter(job_key, {"files": files, "chunks": chunks, "embeddings": embeddings})
+                return False
+            INDEX_ITEMS.inc(len(chunks), stage="insert")
+
+        append_checkpoint(job_key, {
+            "files": files, "hashes": hashes, "inserted": len(chunks), "acknowledged_at": time.time()
+        })
+        return True
+
+    def _ingest(self, repo_path: str, job_key: str, checkpoint: List[Dict[str, Any]],
+                paths: List[str], read_file: Callable[[str], str]) -> Tuple[Dict[str, List[str]], bool]:
+        """
+        Parses, embeds and inserts files in checkpointed batches.
+        Files recorded in the checkpoint are skipped while their content hash still matches,
+        so a restarted job resumes where it stopped without missing later edits.
+        Returns ({file_path: chunk_ids} for every ingested file in `paths`, whether every file
+        was read, embedded and inserted).
+        """
+        indexed, hashes = {}, {}
+        for record in checkpoint:
+            indexed.update(record["files"])
+            hashes.update(record.get("hashes", {}))
+        if indexed:
+            logger.info(f"Resuming from checkpoint: {len(indexed)} files already ingested")
+
+        source = os.path.abspath(repo_path)
+        complete = True
+        batch_files, batch_hashes, batch_chunks, batch_embeddings = {}, {}, [], []
+
+        for file_path in paths:
+            try:
+                with timed(INDEX_STAGE_SECONDS, "index_read", stage="read"):
+                    content = read_file(file_path)
+                INDEX_ITEMS.inc(stage="read")
+                content_hash = hashlib.sha1(content.encode("utf-8")).hexdigest()
+                if file_path in indexed and hashes.get(file_path) == content_hash:
+                    continue
+                # Changed since it was checkpointed (or never ingested): process it again
+                indexed.pop(file_path, None)
+                chunks, embeddings = self._process_file(source, file_path, content)
+            except Exception as e:
+                # Not checkpointed, so a re-run retries the file; the job is reported incomplete
+                logger.error(f"Failed to process {file_path}: {e}")
+                append_dead_letter(job_key, {"files": {file_path: None}, "error": str(e)})
+                complete = False
+                continue
+
+            batch_files[file_path] = [chunk["id"] for chunk in chunks]
+            batch_hashes[file_path] = content_hash
+            batch_chunks.extend(chunks)
+            batch_embeddings.extend(embeddings)
+
+            if len(batch_chunks) >= settings.INDEX_BATCH_SIZE:
+                if self._flush_batch(job_key, batch_files, batch_hashes, batch_chunks, batch_embeddings):
+                    indexed.update(batch_files)
+                else:
+                    complete = False
+                batch_files, batch_hashes, batch_chunks, batch_embeddings = {}, {}, [], []
+
+        if batch_files:
+            if self._flush_batch(job_key, batch_files, batch_hashes, batch_chunks, batch_embeddings):
+                indexed.update(batch_files)
+            else:
+                complete = False
+
+        # Checkpointed files that are gone from `paths` were not part of this run
+        wanted = set(paths)
+        return {path: chunk_ids for path, chunk_ids in indexed.items() if path in wanted}, complete
+
     def index_repository(self, repo_path: str):
-        """Walks the repository, parses files, embeds chunks, and stores in Endee."""
+        """
+        Walks the repository, parses files, embeds chunks, and stores in Endee.
+        Progress is checkpointed per batch; calling this again after a crash resumes the job.
+        The index then reflects the working tree rather than a commit, so the next
+        index_commit re-parses the full tree.
+        """
         logger.info(f"Indexing repository at {repo_path}")
-        
-        all_chunks = []
-        all_embeddings = []
-        
-        for root, _, files in os.walk(repo_path):
-            if "venv" in root or ".git" in root or "__pycache__" in root:
-                continue
-                
-            for file in files:
-                if not file.endswith((".py", ".js", ".ts", ".md")):
-                    continue
-                    
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                        content = f.read()
-                    
-                    file_chunks = self.parser.parse_file(file_path, content)
-                    if not file_chunks:
-                        continue
-                        
-                    # Generate embeddings for chunks
-                    texts = [chunk["content"] for chunk in file_chunks]
-                    embeddings = self.embedder.encode(texts).tolist()
-                    
-                    all_chunks.extend(file_chunks)
-                    all_embeddings.extend(embeddings)
-                    
-                except Exception as e:
-                    logger.error(f"Failed to process {file_path}: {e}")
+        job_key = os.path.abspath(repo_path)
+        indexed_files = load_state(repo_path).get("files", {})
+        checkpoint = load_checkpoint(job_key)
+
+        # A crashed run's chunks are already in the store; track them in case their files changed since
+        for record in checkpoint:
+            for path, chunk_ids in record["files"].items():
+                indexed_files[path] = sorted(set(indexed_files.get(path, [])) | set(chunk_ids))
+
+        def save(files: Dict[str, List[str]]):
+            save_state(repo_path, {"repo_path": os.path.abspath(repo_path), "commit": None, "files": files})
+
+        # Written before any insert, so a crash cannot leave a state claiming a commit
+        save(indexed_files)
+
+        def read_file(path: str) -> str:
+            return read_text_file(os.path.join(repo_path, path))
 
-        # Batch insert into Endee
-        if all_chunks:
-            logger.info(f"Inserting {len(all_chunks)} vectors to Endee...")
-            db_client.insert_vectors(all_embeddings, all_chunks)
+        paths = walk_working_tree(repo_path)
+        indexed, complete = self._ingest(repo_path, job_key, checkpoint, paths, read_file)
+        # The checkpoint only resumes a crashed run; the next run starts from the current tree
+        clear_checkpoint(job_key)
+
+        # Re-ingested files replace their vectors and deleted files lose theirs, once the new
+        # ones are in; files that failed keep their previous vectors
+        current = set(paths)
+        files, obsolete_ids = {}, []
+        for path, chunk_ids in indexed_files.items():
+            if path in indexed:
+                new_ids = set(indexed[path])
+                obsolete_ids.extend(doc_id for doc_id in chunk_ids if doc_id not in new_ids)
+            elif path not in current:
+                obsolete_ids.extend(chunk_ids)
+            else:
+                files[path] = chunk_ids
+        files.update({path: chunk_ids for path, chunk_ids in indexed.items() if chunk_ids})
+        if obsolete_ids:
+            db_client.delete_vectors(obsolete_ids)
+        save(files)
+
+        if not complete:
+            logger.error("Indexing finished with failed files or batches. Re-run indexing to retry them.")
+            return
+
+        if any(indexed.values()):
             logger.info("Indexing complete.")
         else:
             logger.warning("No chunks found to index.")
 
+    def index_commit(self, repo_path: str, rev: str = "HEAD"):
+        """
+        Indexes a commit straight from the git object store, without a checkout.
+        If the repository was previously indexed at a commit that still exists,
+        only the paths changed between the two commits are re-parsed.
+        """
+        commit = resolve_commit(repo_path, rev)
+        state = load_state(repo_path)
+        indexed_files = state.get("files", {})
+        previous = state.get("commit")
+
+        if previous == commit:
+            logger.info(f"Index for {repo_path} already reflects commit {commit}")
+            return
+
+        if previous and commit_exists(repo_path, previous):
+            logger.info(f"Indexing {repo_path} at {commit} (diff against {previous})")
+            changed = {}
+            removed = []
+            for status, path, blob in diff_tree(repo_path, previous, commit):
+                if not is_indexable(path):
+                    continue
+                if blob is None:
+                    removed.append(path)
+                else:
+                    changed[path] = blob
+        else:
+            logger.info(f"Indexing {repo_path} at {commit} (full tree)")
+            changed = {path: blob for path, blob in list_tree(repo_path, commit).items() if is_indexable(path)}
+            removed = list(indexed_files)
+
+        job_key = f"{os.path.abspath(repo_path)}@{commit}"
+        checkpoint = load_checkpoint(job_key)
+
+        # Vectors of files that were deleted or are being re-parsed; they are only
+        # deleted once the new ones are in, so changed files stay searchable meanwhile
+        stale_ids = []
+        for path in removed + list(changed):
+            stale_ids.extend(indexed_files.pop(path, []))
+
+        with GitObjectReader(repo_path) as reader:
+            def read_blob(path: str) -> str:
+                return reader.read(changed[path]).decode("utf-8", errors="ignore")
+
+            ingested, complete = self._ingest(repo_path, job_key, checkpoint, sorted(changed), read_blob)
+
+        if not complete:
+            logger.error(f"Indexing of {commit} finished with failed files or batches; index state left at {previous}. "
+                         "Re-run indexing to retry them.")
+            return
+
+        for path, chunk_ids in ingested.items():
+            if chunk_ids:
+                indexed_files[path] = chunk_ids
+
+        # Chunk IDs are derived from path and line range, so unchanged chunks were overwritten in place
+        current_ids = {doc_id for chunk_ids in ingested.values() for doc_id in chunk_ids}
+        obsolete_ids = [doc_id for doc_id in stale_ids if doc_id not in current_ids]
+        if obsolete_ids:
+            db_client.delete_vectors(obsolete_ids)
+
+        save_state(repo_path, {
+            "repo_path": os.path.abspath(repo_path),
+            "commit": commit,
+            "files": indexed_files
+        })
+        clear_checkpoint(job_key)
+        logger.info(f"Indexing complete. Index now reflects commit {commit} ({len(changed)} files parsed, {len(removed)} removed)")
+
 # Singleton
 indexer = Indexer()
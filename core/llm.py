@@ -1,5 +1,22 @@
+import time
+import queue
+import logging
+import itertools
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional
 from langchain_community.llms import Ollama
 from core.config import settings
+from core.metrics import (
+    record, LLM_PROMPT_TOKENS, LLM_TTFT_SECONDS, LLM_TOTAL_SECONDS,
+    LLM_QUEUE_WAIT_SECONDS, LLM_QUEUE_DEPTH, LLM_REQUESTS
+)
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
 
 def get_llm():
     """Returns an instance of the configured LLM."""
@@ -7,3 +24,139 @@ def get_llm():
         base_url=settings.OLLAMA_BASE_URL,
         model=settings.LLM_MODEL_NAME
     )
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); avoids loading a tokenizer."""
+    return max(1, len(text) // 4)
+
+class LLMGatewayError(Exception):
+    """Base class for requests the gateway could not serve."""
+
+class LLMQueueFullError(LLMGatewayError):
+    """Raised when too many generations are already waiting."""
+
+class LLMTimeoutError(LLMGatewayError):
+    """Raised when a generation did not finish within the caller's timeout."""
+
+class _Job:
+    def __init__(self, prompt: str, agent: str, priority: int):
+        self.prompt = prompt
+        self.agent = agent
+        self.priority = priority
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+        self.waiters = 1
+        self.started = False
+        self.cancelled = False
+
+class LLMGateway:
+    """
+    Shared entry point for all LLM calls.
+    Runs at most LLM_MAX_CONCURRENCY generations at once, serves interactive
+    requests before batch ones, and coalesces identical in-flight prompts
+    into a single generation.
+    """
+    def __init__(self, max_concurrency: int = None, max_queue_size: int = None, timeout: float = None):
+        self.llm = get_llm()
+        self.max_queue_size = max_queue_size or settings.LLM_MAX_QUEUE_SIZE
+        self.timeout = timeout or settings.LLM_TIMEOUT
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._inflight: Dict[str, _Job] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        for i in range(max_concurrency or settings.LLM_MAX_CONCURRENCY):
+            threading.Thread(target=self._worker, name=f"llm-gateway-{i}", daemon=True).start()
+
+    def generate(self, prompt: str, agent: str, priority: int = PRIORITY_INTERACTIVE,
+                 timeout: Optional[float] = None) -> str:
+        """Queues a generation (or joins an identical one in flight) and waits for its text."""
+        with self._lock:
+            job = self._inflight.get(prompt)
+            if job is not None:
+                job.waiters += 1
+                LLM_REQUESTS.inc(outcome="coalesced")
+                if priority < job.priority and not job.started:
+                    # Re-queue at the higher priority; the worker skips the stale entry
+                    job.priority = priority
+                    self._queue.put((priority, next(self._sequence), job))
+            else:
+                if self._pending >= self.max_queue_size:
+                    LLM_REQUESTS.inc(outcome="rejected")
+                    raise LLMQueueFullError(f"LLM queue is full ({self._pending} requests waiting)")
+                job = _Job(prompt, agent, priority)
+                self._inflight[prompt] = job
+                self._pending += 1
+                LLM_QUEUE_DEPTH.set(self._pending)
+                self._queue.put((priority, next(self._sequence), job))
+
+        try:
+            text, stats = job.future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            self._abandon(job)
+            LLM_REQUESTS.inc(outcome="timeout")
+            raise LLMTimeoutError(f"LLM did not answer within {timeout or self.timeout:g}s")
+
+        # Generation ran on a worker thread; copy its stats into this request's breakdown
+        for stage, value in stats.items():
+            record(stage, value)
+        return text
+
+    def _abandon(self, job: _Job):
+        with self._lock:
+            job.waiters -= 1
+            if job.waiters > 0:
+                return
+            # Nobody is waiting any more: drop it from the queue, or stop streaming if running
+            job.cancelled = True
+            if self._inflight.get(job.prompt) is job:
+                del self._inflight[job.prompt]
+            if not job.started:
+                self._pending -= 1
+                LLM_QUEUE_DEPTH.set(self._pending)
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            with self._lock:
+                if job.started or job.cancelled:
+                    continue
+                job.started = True
+                self._pending -= 1
+                LLM_QUEUE_DEPTH.set(self._pending)
+
+            try:
+                job.future.set_result(self._run(job))
+                LLM_REQUESTS.inc(outcome="generated")
+            except Exception as e:
+                job.future.set_exception(e)
+            finally:
+                with self._lock:
+                    if self._inflight.get(job.prompt) is job:
+                        del self._inflight[job.prompt]
+
+    def _run(self, job: _Job):
+        """Streams the completion so time-to-first-token can be measured."""
+        queue_wait = time.perf_counter() - job.enqueued_at
+        LLM_QUEUE_WAIT_SECONDS.observe(queue_wait, agent=job.agent)
+        prompt_tokens = estimate_tokens(job.prompt)
+        LLM_PROMPT_TOKENS.observe(prompt_tokens, agent=job.agent)
+        stats: Dict[str, Any] = {"llm_queue_wait": queue_wait, "prompt_tokens": prompt_tokens}
+
+        start = time.perf_counter()
+        parts = []
+        for chunk in self.llm.stream(job.prompt):
+            if job.cancelled:
+                raise LLMTimeoutError("Generation abandoned by all callers")
+            if not parts:
+                stats["llm_ttft"] = time.perf_counter() - start
+                LLM_TTFT_SECONDS.observe(stats["llm_ttft"], agent=job.agent)
+            parts.append(chunk)
+
+        stats["llm_total"] = time.perf_counter() - start
+        LLM_TOTAL_SECONDS.observe(stats["llm_total"], agent=job.agent)
+        return "".join(parts), stats
+
+# Singleton
+llm_gateway = LLMGateway()
@@ -0,0 +1,187 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from a fast metadata decode up to a slow CPU generation
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class Registry:
+    """Holds all metrics and renders them in the Prometheus text exposition format."""
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_str(self, key: Tuple[str, ...], extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._label_str(key)} {_format_value(value)}" for key, value in items]
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._label_str(key)} {_format_value(value)}" for key, value in items]
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # [per-bucket counts, sum, count]
+            state = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{self._label_str(key, [('le', _format_value(bound))])} {bucket_count}")
+            lines.append(f"{self.name}_bucket{self._label_str(key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{self._label_str(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._label_str(key)} {count}")
+        return lines
+
+# Per-request breakdown. Only populated while a `collect_timings()` block is active.
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+@contextmanager
+def collect_timings():
+    """Collects what is recorded in this context into a dict (stage -> seconds, plus prompt_tokens)."""
+    timings = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+# Copied contexts share the same breakdown dict, so pool threads may record into it concurrently
+_record_lock = threading.Lock()
+
+def record(stage: str, value: float):
+    """
+    Adds a value to the current request's breakdown, if one is being collected.
+    Values recorded by concurrent work are summed, so e.g. `endee_search` for parallel
+    searches is their total time and can exceed the request's wall time.
+    """
+    timings = _request_timings.get()
+    if timings is not None:
+        with _record_lock:
+            timings[stage] = round(timings.get(stage, 0.0) + value, 6)
+
+@contextmanager
+def timed(histogram: Histogram, breakdown_key: str, **labels):
+    """
+    Observes the block's duration in `histogram` and in the request breakdown under
+    `breakdown_key`. Keyword arguments are the histogram's labels (e.g. `stage="read"`).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, **labels)
+        record(breakdown_key, elapsed)
+
+# Metrics
+REQUEST_SECONDS = Histogram("repomind_request_seconds", "End-to-end API request latency.", ["endpoint"])
+RETRIEVAL_SECONDS = Histogram("repomind_retrieval_seconds", "Retriever.search latency (embed + Endee search).")
+EMBED_SECONDS = Histogram("repomind_embed_seconds", "Query embedding latency.", ["caller"])
+ENDEE_SECONDS = Histogram("repomind_endee_request_seconds", "Endee HTTP round trip latency.", ["operation"])
+METADATA_DECODE_SECONDS = Histogram(
+    "repomind_metadata_decode_seconds", "Time to unpack and decompress search result metadata."
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "repomind_llm_prompt_tokens", "Estimated prompt size in tokens.", ["agent"], buckets=TOKEN_BUCKETS
+)
+LLM_TTFT_SECONDS = Histogram("repomind_llm_time_to_first_token_seconds", "LLM time to first token.", ["agent"])
+LLM_TOTAL_SECONDS = Histogram("repomind_llm_generation_seconds", "LLM total generation time.", ["agent"])
+LLM_QUEUE_WAIT_SECONDS = Histogram("repomind_llm_queue_wait_seconds", "Time spent waiting for an LLM slot.", ["agent"])
+LLM_QUEUE_DEPTH = Gauge("repomind_llm_queue_depth", "Generations waiting for an LLM slot.")
+LLM_REQUESTS = Counter(
+    "repomind_llm_requests_total", "LLM gateway requests by outcome (generated, coalesced, rejected, timeout).",
+    ["outcome"]
+)
+INDEX_STAGE_SECONDS = Histogram(
+    "repomind_index_stage_seconds",
+    "Indexing time per stage (per file for read/parse/embed, per batch for insert).",
+    ["stage"]
+)
+INDEX_ITEMS = Counter("repomind_index_items_total", "Files or chunks processed per indexing stage.", ["stage"])
@@ -1,22 +1,98 @@
-from typing import List, Dict, Any
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple
 from sentence_transformers import SentenceTransformer
-from core.database import db_client
+from core.database import db_client, summary_db_client
 from core.config import settings
+from core.metrics import timed, EMBED_SECONDS, RETRIEVAL_SECONDS
 
 class Retriever:
     def __init__(self):
         self.embedder = SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
+        self._search_pool = ThreadPoolExecutor(max_workers=settings.SEARCH_MAX_PARALLEL)
+        # Monotonic time until which the summary tier is assumed empty and not searched
+        self._summary_tier_empty_until = 0.0
 
     def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """
         Semantically searches the codebase for the query.
         """
-        # 1. Generate Query Embedding
-        query_vector = self.embedder.encode(query).tolist()
-        
-        # 2. Search in Endee
-        results = db_client.search(query_vector, limit=top_k)
+        with timed(RETRIEVAL_SECONDS, "retrieval"):
+            # 1. Generate Query Embedding
+            with timed(EMBED_SECONDS, "embed", caller="query"):
+                query_vector = self.embedder.encode(query).tolist()
+
+            # 2. Search in Endee
+            results = db_client.search(query_vector, limit=top_k)
         
         return results
 
+    def search_many(self, queries: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Runs several queries at roughly the cost of one: all queries are embedded
+        in a single batch and the Endee searches run concurrently.
+        Returns one result list per query, in order.
+        """
+        if not queries:
+            return []
+
+        with timed(RETRIEVAL_SECONDS, "retrieval"):
+            with timed(EMBED_SECONDS, "embed", caller="query_batch"):
+                query_vectors = self.embedder.encode(queries).tolist()
+
+            # Each search runs in a copy of this context so its timings reach the request breakdown
+            # (summed across searches, so endee_search may exceed wall time)
+            futures = [
+                self._search_pool.submit(contextvars.copy_context().run, db_client.search, vector, top_k)
+                for vector in query_vectors
+            ]
+            return [future.result() for future in futures]
+
+    def search_two_stage(self, query: str, summary_k: int, locations_k: int,
+                         chunks_k: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Searches the summary tier, then searches code chunks only inside the files and
+        modules the top `locations_k` summaries point at (one filtered search each).
+        Returns (summaries, code chunks); both are empty when no summary matched, and the
+        summary search is skipped while the tier is known to be empty.
+        """
+        if self._summary_tier_empty_until > time.monotonic():
+            return [], []
+
+        with timed(RETRIEVAL_SECONDS, "retrieval"):
+            with timed(EMBED_SECONDS, "embed", caller="query"):
+                query_vector = self.embedder.encode(query).tolist()
+
+            summaries = summary_db_client.search(query_vector, limit=summary_k)
+            if not summaries:
+                # Never built (or not reachable): don't pay for the extra search on every request
+                self._summary_tier_empty_until = time.monotonic() + settings.QA_SUMMARY_RECHECK_SECONDS
+                return [], []
+
+            # Paths are repo-relative and collections are shared, so every filter names the repository
+            filters = []
+            for summary in summaries[:locations_k]:
+                meta = summary["metadata"]
+                if not meta.get("repo_path"):
+                    # Stored before summaries recorded their repository; can't be scoped
+                    continue
+                if meta.get("type") == "module_summary":
+                    location = {"module": {"$eq": meta.get("module", meta.get("file_path", ""))}}
+                else:
+                    location = {"file_path": {"$eq": meta.get("file_path")}}
+                filters.append([{"repo_path": {"$eq": meta["repo_path"]}}, location])
+
+            futures = [
+                self._search_pool.submit(contextvars.copy_context().run, db_client.search, query_vector, chunks_k, f)
+                for f in filters
+            ]
+            chunks = {}
+            for future in futures:
+                for hit in future.result():
+                    chunks.setdefault(hit["id"], hit)
+
+        ranked = sorted(chunks.values(), key=lambda hit: hit["score"], reverse=True)
+        return summaries, ranked[:chunks_k]
+
 retriever = Retriever()
@@ -0,0 +1,174 @@
+import os
+import sys
+import posixpath
+import uuid
+import hashlib
+import logging
+from typing import Dict, Any, List
+
+from core.config import settings
+from core.database import summary_db_client
+from core.indexer import indexer, walk_working_tree, read_text_file
+from core.index_state import load_summary_cache, save_summary_cache
+from core.llm import llm_gateway, PRIORITY_BATCH
+
+logger = logging.getLogger(__name__)
+
+FILE_SUMMARY_TEMPLATE = """
+Summarize what the following source file does in at most three sentences, for a developer
+new to the codebase. Name its main classes and functions and what they are responsible for.
+
+FILE: {path}
+
+{content}
+
+SUMMARY:
+"""
+
+MODULE_SUMMARY_TEMPLATE = """
+Summarize the responsibility of the following module (directory) in at most three sentences,
+based on the summaries of its files. Describe how the files work together.
+
+MODULE: {path}
+
+{file_summaries}
+
+SUMMARY:
+"""
+
+# Bumped when stored summary metadata changes, so cached summaries are stored again
+SUMMARY_FORMAT = 2
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class Summarizer:
+    """
+    Offline stage that builds the summary tier: a short LLM summary per file and per
+    module (directory), embedded into their own Endee collection. Summaries are cached
+    by content hash, so re-running only re-summarizes files that changed.
+    """
+    def __init__(self):
+        # Shares the indexer's model so summaries and code live in the same vector space
+        self.embedder = indexer.embedder
+
+    def _summarize(self, template: str, **kwargs) -> str:
+        prompt = template.format(**kwargs)
+        return llm_gateway.generate(prompt, agent="summarizer", priority=PRIORITY_BATCH).strip()
+
+    def _summary_id(self, repo_path: str, kind: str, path: str) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{kind}:{os.path.abspath(repo_path)}:{path}"))
+
+    def _store(self, repo_path: str, kind: str, entries: Dict[str, Dict[str, Any]]):
+        """Embeds and inserts summaries that changed since they were last stored."""
+        pending = {path: entry for path, entry in entries.items() if not entry.get("stored")}
+        if not pending:
+            return
+
+        # IDs are deterministic, so the insert overwrites the previous version of each summary
+        metadata = []
+        for path, entry in pending.items():
+            entry["id"] = self._summary_id(repo_path, kind, path)
+            meta = {
+                "id": entry["id"],
+                "type": kind,
+                "repo_path": os.path.abspath(repo_path),
+                "file_path": path,
+                "name": posixpath.basename(path) or path or ".",
+                "content": entry["summary"],
+                "language": "text"
+            }
+            if kind == "module_summary":
+                meta["module"] = path
+            metadata.append(meta)
+        embeddings = self.embedder.encode([m["content"] for m in metadata]).tolist()
+        if summary_db_client.insert_vectors(embeddings, metadata):
+            for entry in pending.values():
+                entry["stored"] = True
+
+    def summarize_repository(self, repo_path: str):
+        """Summarizes new or changed files, then the modules whose file summaries changed."""
+        logger.info(f"Summarizing repository at {repo_path}")
+        cache = load_summary_cache(repo_path)
+        file_entries = cache.setdefault("files", {})
+        module_entries = cache.setdefault("modules", {})
+        if cache.get("format") != SUMMARY_FORMAT:
+            # Re-insert under the same IDs with the current metadata; no LLM calls needed
+            for entry in list(file_entries.values()) + list(module_entries.values()):
+                entry["stored"] = False
+            cache["format"] = SUMMARY_FORMAT
+
+        paths = walk_working_tree(repo_path)
+        summarized = 0
+        for path in paths:
+            try:
+                content = read_text_file(os.path.join(repo_path, path))
+            except Exception as e:
+                logger.error(f"Failed to read {path}: {e}")
+                continue
+
+            content_hash = _hash(content)
+            entry = file_entries.get(path)
+            if entry and entry["hash"] == content_hash:
+                continue
+            try:
+                summary = self._summarize(
+                    FILE_SUMMARY_TEMPLATE, path=path, content=content[:settings.SUMMARY_MAX_FILE_CHARS]
+                )
+            except Exception as e:
+                logger.error(f"Failed to summarize {path}: {e}")
+                continue
+
+            file_entries[path] = {
+                "hash": content_hash, "summary": summary, "id": (entry or {}).get("id"), "stored": False
+            }
+            summarized += 1
+            # Persist after every file so an interrupted run keeps its LLM work
+            save_summary_cache(repo_path, cache)
+
+        # Forget files that no longer exist
+        current = set(paths)
+        removed = [path for path in file_entries if path not in current]
+        stale_ids = [file_entries.pop(path).get("id") for path in removed]
+
+        # Module summaries are built from their files' summaries
+        modules: Dict[str, List[str]] = {}
+        for path in sorted(file_entries):
+            # Paths are repo-relative POSIX paths; files at the top level form the "" module
+            modules.setdefault(posixpath.dirname(path), []).append(path)
+
+        for module, files in modules.items():
+            file_summaries = "\n\n".join(f"{path}: {file_entries[path]['summary']}" for path in files)
+            module_hash = _hash(file_summaries)
+            entry = module_entries.get(module)
+            if entry and entry["hash"] == module_hash:
+                continue
+            try:
+                summary = self._summarize(MODULE_SUMMARY_TEMPLATE, path=module, file_summaries=file_summaries)
+            except Exception as e:
+                logger.error(f"Failed to summarize module {module}: {e}")
+                continue
+            module_entries[module] = {
+                "hash": module_hash, "summary": summary, "id": (entry or {}).get("id"), "stored": False
+            }
+            summarized += 1
+            save_summary_cache(repo_path, cache)
+
+        for module in [m for m in module_entries if m not in modules]:
+            stale_ids.append(module_entries.pop(module).get("id"))
+
+        stale_ids = [doc_id for doc_id in stale_ids if doc_id]
+        if stale_ids:
+            summary_db_client.delete_vectors(stale_ids)
+
+        self._store(repo_path, "file_summary", file_entries)
+        self._store(repo_path, "module_summary", module_entries)
+        save_summary_cache(repo_path, cache)
+        logger.info(f"Summaries complete: {summarized} generated, {len(removed)} files removed")
+
+# Singleton
+summarizer = Summarizer()
+
+if __name__ == "__main__":
+    # Offline usage: python -m core.summarizer <repo_path>
+    summarizer.summarize_repository(sys.argv[1] if len(sys.argv) > 1 else ".")
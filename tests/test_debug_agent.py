@@ -0,0 +1,38 @@
+import sys
+import types
+
+# The retriever loads the embedding model at import time; swap in a stub before importing it
+_fake_st = types.ModuleType("sentence_transformers")
+_fake_st.SentenceTransformer = lambda name: None
+sys.modules.setdefault("sentence_transformers", _fake_st)
+
+from agents.debug_agent import _extract_frames  # noqa: E402
+
+def test_node_frames_with_async_and_new_prefixes():
+    trace = "\n".join([
+        "TypeError: Cannot read properties of undefined (reading 'id')",
+        "    at Foo.bar [as baz] (/srv/app/src/foo.js:7:2)",
+        "    at new Foo (/srv/app/foo.js:1:1)",
+        "    at async handler (/srv/app/src/routes.js:10:3)",
+        "    at /srv/app/src/index.js:3:5",
+        "    at Module._compile (node:internal/modules/cjs/loader:1256:14)",
+        "    at async Promise.all (index 0)",
+    ])
+    frames = [(f["func"], f["file"], f["line"]) for f in _extract_frames(trace)]
+    assert frames == [
+        ("Foo.bar [as baz]", "/srv/app/src/foo.js", "7"),
+        ("Foo", "/srv/app/foo.js", "1"),
+        ("handler", "/srv/app/src/routes.js", "10"),
+        (None, "/srv/app/src/index.js", "3"),
+    ]
+
+def test_windows_project_lib_dir_is_not_library_code():
+    trace = "\n".join([
+        "Traceback (most recent call last):",
+        '  File "C:\\proj\\lib\\utils.py", line 5, in load',
+        "    return json.loads(data)",
+        '  File "C:\\Python311\\Lib\\json\\__init__.py", line 346, in loads',
+        "    return _default_decoder.decode(s)",
+        "json.decoder.JSONDecodeError: Expecting value",
+    ])
+    assert [f["file"] for f in _extract_frames(trace)] == ["C:\\proj\\lib\\utils.py"]
@@ -0,0 +1,232 @@
+import os
+import sys
+import types
+import subprocess
+
+import numpy as np
+import pytest
+
+# The indexer loads its embedding model at import time; swap in a stub before importing it
+_fake_st = types.ModuleType("sentence_transformers")
+_fake_st.SentenceTransformer = lambda name: None
+sys.modules["sentence_transformers"] = _fake_st
+
+import core.indexer as indexer_module  # noqa: E402
+from core.config import settings  # noqa: E402
+from core.index_state import load_state, load_checkpoint  # noqa: E402
+from core.git_source import GitError  # noqa: E402
+
+PY_FILE = '''
+def alpha():
+    return 1
+
+def beta():
+    return 2
+
+class Gamma:
+    def delta(self):
+        return 3
+'''
+
+class StubEmbedder:
+    def __init__(self):
+        self.fail_on = None
+
+    def encode(self, texts):
+        if self.fail_on and any(self.fail_on in t for t in texts):
+            raise RuntimeError("embedding failed")
+        return np.ones((len(texts), 4))
+
+class StubDB:
+    def __init__(self):
+        self.vectors = {}
+        self.fail_inserts = False
+
+    def insert_vectors(self, vectors, metadata):
+        if self.fail_inserts:
+            return False
+        for meta in metadata:
+            self.vectors[meta["id"]] = meta
+        return True
+
+    def delete_vectors(self, ids):
+        for doc_id in ids:
+            self.vectors.pop(doc_id, None)
+        return len(ids)
+
+@pytest.fixture
+def indexer(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INDEX_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setattr(settings, "INSERT_MAX_RETRIES", 0)
+    db = StubDB()
+    monkeypatch.setattr(indexer_module, "db_client", db)
+    idx = indexer_module.Indexer.__new__(indexer_module.Indexer)
+    idx.embedder = StubEmbedder()
+    idx.parser = indexer_module.CodeParser()
+    idx.db = db
+    return idx
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                   check=True, capture_output=True)
+
+def _write(repo, name, content):
+    path = repo / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+def test_index_repository_inserts_all_chunks(indexer, tmp_path):
+    repo = tmp_path / "repo"
+    _write(repo, "a.py", PY_FILE)
+    _write(repo, "pkg/b.py", PY_FILE)
+
+    indexer.index_repository(str(repo))
+
+    # alpha, beta, Gamma, delta per file
+    assert len(indexer.db.vectors) == 8
+    assert load_checkpoint(os.path.abspath(str(repo))) == []
+
+def test_index_commit_full_then_incremental(indexer, tmp_path):
+    repo = tmp_path / "repo"
+    _write(repo, "a.py", PY_FILE)
+    _write(repo, "b.py", PY_FILE)
+    _git(repo, "init", "-q")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "first")
+
+    indexer.index_commit(str(repo), "HEAD")
+    state = load_state(str(repo))
+    assert len(indexer.db.vectors) == 8
+    assert sorted(state["files"]) == ["a.py", "b.py"]
+
+    _write(repo, "a.py", "def only():\n    return 0\n")
+    (repo / "b.py").unlink()
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-qm", "second")
+
+    indexer.index_commit(str(repo), "HEAD")
+    state = load_state(str(repo))
+    assert sorted(m["name"] for m in indexer.db.vectors.values()) == ["only"]
+    assert list(state["files"]) == ["a.py"]
+    assert state["commit"] == subprocess.run(
+        ["git", "-C", str(repo), "rev-parse", "HEAD"], capture_output=True, text=True
+    ).stdout.strip()
+
+def test_embed_failure_is_retried_on_next_run(indexer, tmp_path):
+    repo = tmp_path / "repo"
+    _write(repo, "a.py", PY_FILE)
+    _write(repo, "b.py", PY_FILE.replace("alpha", "broken"))
+    indexer.embedder.fail_on = "broken"
+
+    indexer.index_repository(str(repo))
+    job_key = os.path.abspath(str(repo))
+    assert len(indexer.db.vectors) == 4
+    # The run ended, so its checkpoint is not kept for later runs
+    assert load_checkpoint(job_key) == []
+
+    indexer.embedder.fail_on = None
+    indexer.index_repository(str(repo))
+    assert len(indexer.db.vectors) == 8
+
+def test_file_edited_after_incomplete_run_is_reindexed(indexer, tmp_path):
+    repo = tmp_path / "repo"
+    _write(repo, "a.py", PY_FILE)
+    _write(repo, "b.py", "def broken():\n    return 0\n")
+    indexer.embedder.fail_on = "broken"
+    indexer.index_repository(str(repo))
+
+    _write(repo, "a.py", PY_FILE.replace("alpha", "renamed"))
+    indexer.index_repository(str(repo))
+
+    assert sorted(m["name"] for m in indexer.db.vectors.values()) == ["Gamma", "beta", "delta", "renamed"]
+
+def test_crashed_run_resumes_but_reprocesses_edited_files(indexer, tmp_path):
+    repo = tmp_path / "repo"
+    _write(repo, "a.py", PY_FILE)
+    _write(repo, "b.py", PY_FILE.replace("alpha", "other"))
+    job_key = os.path.abspath(str(repo))
+
+    # A run that stopped after ingesting both files, before clearing its checkpoint
+    read = lambda path: (repo / path).read_text()
+    indexer._ingest(str(repo), job_key, [], ["a.py", "b.py"], read)
+    _write(repo, "a.py", PY_FILE.replace("alpha", "renamed"))
+
+    indexer.embedder.fail_on = "other"
+    indexer.index_repository(str(repo))
+
+    # b.py is unchanged and resumed from the checkpoint (embedding it again would fail)
+    names = sorted(m["name"] for m in indexer.db.vectors.values())
+    assert names == sorted(["Gamma", "beta", "delta", "renamed", "Gamma", "beta", "delta", "other"])
+    assert load_checkpoint(job_key) == []
+
+def test_index_commit_read_failure_keeps_previous_state(indexer, tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    _write(repo, "a.py", PY_FILE)
+    _git(repo, "init", "-q")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "first")
+    indexer.index_commit(str(repo), "HEAD")
+    first = load_state(str(repo))["commit"]
+
+    _write(repo, "a.py", PY_FILE + "\ndef epsilon():\n    return 4\n")
+    _git(repo, "commit", "-qam", "second")
+
+    def fail_read(self, object_name):
+        raise GitError("cat-file failed")
+    monkeypatch.setattr(indexer_module.GitObjectReader, "read", fail_read)
+    indexer.index_commit(str(repo), "HEAD")
+
+    assert load_state(str(repo))["commit"] == first
+    # The old vectors of the file that could not be read are still searchable
+    assert len(indexer.db.vectors) == 4
+
+def test_working_tree_and_commit_modes_share_chunk_ids(indexer, tmp_path):
+    repo = tmp_path / "repo"
+    _write(repo, "pkg/a.py", PY_FILE)
+    _git(repo, "init", "-q")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "first")
+
+    indexer.index_repository(str(repo))
+    indexer.index_commit(str(repo), "HEAD")
+
+    assert len(indexer.db.vectors) == 4
+    assert {m["file_path"] for m in indexer.db.vectors.values()} == {"pkg/a.py"}
+
+def test_index_commit_deletes_stale_vectors_after_insert(indexer, tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    _write(repo, "a.py", PY_FILE)
+    _git(repo, "init", "-q")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "first")
+    indexer.index_commit(str(repo), "HEAD")
+
+    _write(repo, "a.py", PY_FILE + "\ndef epsilon():\n    return 4\n")
+    _git(repo, "commit", "-qam", "second")
+
+    calls = []
+    db = indexer.db
+    insert, delete = db.insert_vectors, db.delete_vectors
+    monkeypatch.setattr(db, "insert_vectors", lambda v, m: calls.append("insert") or insert(v, m))
+    monkeypatch.setattr(db, "delete_vectors", lambda ids: calls.append(("delete", len(ids))) or delete(ids))
+    indexer.index_commit(str(repo), "HEAD")
+
+    # Unchanged chunks keep their IDs, so nothing is left to delete
+    assert calls == ["insert"]
+    assert len(db.vectors) == 5
+
+def test_working_tree_index_forces_full_commit_pass(indexer, tmp_path):
+    repo = tmp_path / "repo"
+    _write(repo, "a.py", PY_FILE)
+    _git(repo, "init", "-q")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "first")
+    indexer.index_commit(str(repo), "HEAD")
+
+    _write(repo, "a.py", "def wip():\n    return 0\n")
+    indexer.index_repository(str(repo))
+    assert load_state(str(repo))["commit"] is None
+    assert sorted(m["name"] for m in indexer.db.vectors.values()) == ["wip"]
+
+    indexer.index_commit(str(repo), "HEAD")
+    assert sorted(m["name"] for m in indexer.db.vectors.values()) == ["Gamma", "alpha", "beta", "delta"]
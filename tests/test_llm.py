@@ -0,0 +1,124 @@
+import time
+import threading
+
+import pytest
+
+from core.llm import LLMGateway, LLMQueueFullError, LLMTimeoutError, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+
+class FakeLLM:
+    """Streams two tokens; prompts starting with "block" wait for `release` before streaming,
+    prompts starting with "slow" wait for it between the two tokens."""
+    def __init__(self):
+        self.prompts = []
+        self.completed = []
+        self.release = threading.Event()
+
+    def stream(self, prompt):
+        self.prompts.append(prompt)
+        if prompt.startswith("block"):
+            self.release.wait(5)
+        yield "answer:"
+        if prompt.startswith("slow"):
+            self.release.wait(5)
+        yield prompt
+        self.completed.append(prompt)
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+def _gateway(max_concurrency=1, max_queue_size=10, timeout=5.0):
+    gateway = LLMGateway(max_concurrency=max_concurrency, max_queue_size=max_queue_size, timeout=timeout)
+    gateway.llm = FakeLLM()
+    return gateway
+
+def _generate_in_thread(gateway, prompt, results, **kwargs):
+    def run():
+        try:
+            results[prompt] = gateway.generate(prompt, agent="test", **kwargs)
+        except Exception as e:
+            results[prompt] = e
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+@pytest.fixture
+def gateway():
+    gateway = _gateway()
+    yield gateway
+    gateway.llm.release.set()
+
+def test_identical_prompts_share_one_generation(gateway):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(gateway.generate("block same", agent="test")))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    _wait_until(lambda: gateway._inflight.get("block same") and gateway._inflight["block same"].waiters == 2)
+    gateway.llm.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["answer:block same"] * 2
+    assert gateway.llm.prompts == ["block same"]
+
+def test_interactive_request_is_served_before_batch(gateway):
+    results = {}
+    threads = [_generate_in_thread(gateway, "block first", results)]
+    _wait_until(lambda: gateway.llm.prompts == ["block first"])
+    threads.append(_generate_in_thread(gateway, "batch", results, priority=PRIORITY_BATCH))
+    _wait_until(lambda: gateway._pending == 1)
+    threads.append(_generate_in_thread(gateway, "interactive", results, priority=PRIORITY_INTERACTIVE))
+    _wait_until(lambda: gateway._pending == 2)
+
+    gateway.llm.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert gateway.llm.prompts == ["block first", "interactive", "batch"]
+
+def test_request_beyond_queue_size_is_rejected():
+    gateway = _gateway(max_queue_size=2)
+    results = {}
+    threads = [_generate_in_thread(gateway, "block running", results)]
+    _wait_until(lambda: gateway.llm.prompts == ["block running"])
+    threads += [_generate_in_thread(gateway, f"queued {i}", results) for i in range(2)]
+    _wait_until(lambda: gateway._pending == 2)
+
+    with pytest.raises(LLMQueueFullError):
+        gateway.generate("one too many", agent="test")
+
+    gateway.llm.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results["queued 1"] == "answer:queued 1"
+
+def test_timed_out_queued_request_is_forgotten(gateway):
+    results = {}
+    running = _generate_in_thread(gateway, "block running", results)
+    _wait_until(lambda: gateway.llm.prompts == ["block running"])
+
+    with pytest.raises(LLMTimeoutError, match="within 0.05s"):
+        gateway.generate("queued", agent="test", timeout=0.05)
+    assert gateway._pending == 0
+    assert list(gateway._inflight) == ["block running"]
+
+    gateway.llm.release.set()
+    running.join(5)
+    _wait_until(lambda: gateway._inflight == {})
+    # The abandoned job is skipped rather than generated
+    assert gateway.llm.prompts == ["block running"]
+
+def test_abandoned_generation_stops_mid_stream(gateway):
+    with pytest.raises(LLMTimeoutError):
+        gateway.generate("slow", agent="test", timeout=0.05)
+    assert gateway._inflight == {}
+
+    gateway.llm.release.set()
+    # The worker stops at the next chunk and is free for new requests
+    assert gateway.generate("after", agent="test") == "answer:after"
+    assert gateway.llm.completed == ["after"]
@@ -0,0 +1,16 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from core.metrics import collect_timings, record
+
+def test_record_from_concurrent_threads_keeps_every_value():
+    with collect_timings() as timings:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, record, "endee_search", 0.001)
+                for _ in range(2000)
+            ]
+            for future in futures:
+                future.result()
+
+    assert timings["endee_search"] == 2.0
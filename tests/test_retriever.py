@@ -0,0 +1,76 @@
+import sys
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+# The retriever loads its embedding model at import time; swap in a stub before importing it
+_fake_st = types.ModuleType("sentence_transformers")
+_fake_st.SentenceTransformer = lambda name: None
+sys.modules.setdefault("sentence_transformers", _fake_st)
+
+import core.retriever as retriever_module  # noqa: E402
+
+class StubEmbedder:
+    def encode(self, texts):
+        return np.ones(4) if isinstance(texts, str) else np.ones((len(texts), 4))
+
+class StubDB:
+    def __init__(self, hits):
+        self.hits = hits
+        self.calls = []
+
+    def search(self, query_vector, limit=5, filters=None):
+        self.calls.append(filters)
+        hits = self.hits
+        for condition in filters or []:
+            for field, op in condition.items():
+                hits = [h for h in hits if h["metadata"].get(field) == op["$eq"]]
+        return sorted(hits, key=lambda h: h["score"], reverse=True)[:limit]
+
+def _hit(doc_id, score, **meta):
+    return {"id": doc_id, "score": score, "metadata": meta, "file_path": meta.get("file_path")}
+
+REPO = "/src/app"
+
+CODE = [
+    _hit("1", 0.9, repo_path=REPO, file_path="api/main.py", module="api"),
+    _hit("2", 0.8, repo_path=REPO, file_path="setup.py", module=""),
+    _hit("3", 0.7, repo_path=REPO, file_path="core/db.py", module="core"),
+    _hit("4", 0.6, repo_path=REPO, file_path="core/indexer.py", module="core"),
+    # Same paths in another indexed repository
+    _hit("5", 0.95, repo_path="/src/other", file_path="setup.py", module=""),
+    _hit("6", 0.95, repo_path="/src/other", file_path="core/indexer.py", module="core"),
+]
+
+@pytest.fixture
+def retriever(monkeypatch):
+    r = retriever_module.Retriever.__new__(retriever_module.Retriever)
+    r.embedder = StubEmbedder()
+    r._search_pool = ThreadPoolExecutor(max_workers=2)
+    r._summary_tier_empty_until = 0.0
+    monkeypatch.setattr(retriever_module, "db_client", StubDB(CODE))
+    return r
+
+def test_two_stage_only_returns_chunks_from_summarized_locations(retriever, monkeypatch):
+    summaries = StubDB([
+        _hit("m", 0.9, type="module_summary", repo_path=REPO, file_path="", module=""),
+        _hit("f", 0.8, type="file_summary", repo_path=REPO, file_path="core/indexer.py"),
+    ])
+    monkeypatch.setattr(retriever_module, "summary_db_client", summaries)
+
+    found, chunks = retriever.search_two_stage("how is it indexed?", summary_k=4, locations_k=2, chunks_k=3)
+
+    assert [s["id"] for s in found] == ["m", "f"]
+    # The root module matches only top-level files, and only those of the summarized repository
+    assert [c["id"] for c in chunks] == ["2", "4"]
+
+def test_two_stage_skips_empty_summary_tier(retriever, monkeypatch):
+    summaries = StubDB([])
+    monkeypatch.setattr(retriever_module, "summary_db_client", summaries)
+
+    assert retriever.search_two_stage("q", 4, 3, 3) == ([], [])
+    assert retriever.search_two_stage("q", 4, 3, 3) == ([], [])
+    assert len(summaries.calls) == 1
+    assert retriever_module.db_client.calls == []